@@ -1,15 +1,23 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import PlainTextResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from pathlib import Path
+import json
 import shutil
 import pandas as pd
 import joblib
 import traceback
 
+from compression import COMPRESSION_SUFFIXES, dataset_stem
+from explain import contributions, feature_names, top_contributions
+from shadow import shadow
+from summary_cache import SummaryCache
+from validation import UploadValidationError
+from velocity import VELOCITY_FEATURES, VELOCITY_KEYS, add_velocity_features
+
 # ── App & CORS ─────────────────────────
 app = FastAPI(title="Insurance Fraud Detection API")
 
@@ -23,16 +31,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Reuse-Ratio", "X-Rejected-Rows"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 # ── Paths & Artifacts ───────────────────
 BASE_DIR      = Path(__file__).parent.parent
 PIPELINE_PATH = BASE_DIR / "src" / "fraud_detection_pipeline.joblib"
 DATA_PATH     = BASE_DIR / "data" / "Final_training_dataset.csv"
 SUMMARY_PATH  = BASE_DIR / "data" / "Prediction_Summary.txt"
+UPLOAD_DIR    = BASE_DIR / "data" / "uploads"
 
 pipeline = joblib.load(PIPELINE_PATH)
 df_all   = pd.read_csv(DATA_PATH)
+summaries = SummaryCache()
+feature_labels = feature_names(pipeline)
 
 # ── Helpers ─────────────────────────────
 def parse_date(dt_str: str) -> datetime:
@@ -64,6 +77,71 @@ def compute_time_diff(inc: str, clm: str) -> float:
         raise ValueError("Could not parse incident or claim time")
     return (b - a).total_seconds() / 3600.0
 
+
+def velocity_history(df: pd.DataFrame, cols: list) -> pd.DataFrame:
+    """Velocity features of every row in `df`, counted over `df` as in training."""
+    def parse(s):
+        try:
+            return parse_date(s)
+        except (ValueError, TypeError):
+            return pd.NaT
+    frame = df[[k for k in VELOCITY_KEYS if k in df.columns]].copy()
+    frame["Time of claim"] = pd.to_datetime(df["Time of claim"].map(parse))
+    return add_velocity_features(frame, "Time of claim")[cols]
+
+
+SUMMARY_MEDIA_TYPES = {"text": "text/plain; charset=utf-8", "json": "application/json"}
+# OpenAPI: summary routes answer with either media type, picked by ?format=
+SUMMARY_RESPONSES = {200: {"content": {t: {} for t in SUMMARY_MEDIA_TYPES.values()}}}
+
+def summary_response(summary_path: Path, fmt: str, request: Optional[Request] = None,
+                     scoring: Optional[dict] = None) -> Response:
+    """Serve a summary file as text or JSON with ETag/Last-Modified validators.
+
+    A matching If-None-Match / If-Modified-Since on `request` yields a 304.
+    `scoring` stats from test() are added as headers and, for JSON, a field;
+    such upload responses are not cacheable and carry no validators, since
+    their body differs from the GET representation the ETag names.
+    """
+    if fmt not in SUMMARY_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'text' or 'json'")
+    try:
+        entry = summaries.get(summary_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Summary not found")
+
+    headers = entry.headers(fmt)
+    if request is not None and entry.not_modified(
+        fmt,
+        request.headers.get("if-none-match"),
+        request.headers.get("if-modified-since"),
+    ):
+        return Response(status_code=304, headers=headers)
+
+    body = entry.body(fmt)
+    if scoring is not None:
+        headers = {"Cache-Control": "no-store"}
+        headers["X-Reuse-Ratio"] = f"{scoring['reuse_ratio']:.4f}"
+        headers["X-Rejected-Rows"] = str(scoring["rejected_rows"])
+        if fmt == "json":
+            body = json.dumps({**json.loads(body), "scoring": scoring})
+    return Response(
+        content=body,
+        media_type=SUMMARY_MEDIA_TYPES[fmt],
+        headers=headers,
+    )
+
+# ── Claim velocity ──────────────────────
+# Only computed for pipelines (or a shadow candidate) trained on them. Counts
+# come from the reference dataset once at startup, as in training, so a
+# claim's score does not depend on earlier requests. Manual claims have no
+# policy/region keys; their velocity inputs get the reference medians.
+model_cols    = list(getattr(pipeline, "feature_names_in_", [])) + shadow.features()
+velocity_cols = list(dict.fromkeys(c for c in model_cols if c in VELOCITY_FEATURES))
+if velocity_cols:
+    velocity_by_row = velocity_history(df_all, velocity_cols)
+    velocity_median = velocity_by_row.median()
+
 # ── Schemas ─────────────────────────────
 class ClaimRequest(BaseModel):
     policy_id: Optional[str] = None
@@ -76,10 +154,15 @@ class ClaimRequest(BaseModel):
     time_of_incident: Optional[str] = None
     time_of_claim: Optional[str] = None
 
+class FeatureContribution(BaseModel):
+    feature: str
+    contribution: float   # towards fraud; negative values favour genuine
+
 class ClaimResponse(BaseModel):
     genuine_probability: float
     fraud_probability: float
     predicted_label: str
+    explanation: Optional[List[FeatureContribution]] = None
 
 # ── Record lookup endpoint ─────────────
 @app.get("/record/{policy_id}")
@@ -104,7 +187,7 @@ def get_record(policy_id: str):
 
 # ── Prediction endpoint ─────────────────
 @app.post("/predict", response_model=ClaimResponse)
-def predict(request: ClaimRequest):
+def predict(request: ClaimRequest, explain: bool = False):
     if request.policy_id:
         row = df_all[df_all["policy_id"] == request.policy_id]
         if row.empty:
@@ -122,6 +205,8 @@ def predict(request: ClaimRequest):
                                         r["Time of claim"]
                                     )
         }
+        if velocity_cols:
+            params.update(velocity_by_row.loc[row.index[0]])
     else:
         required = [
             ("policy_status",      request.policy_status),
@@ -151,57 +236,83 @@ def predict(request: ClaimRequest):
                                         request.time_of_claim
                                     )
         }
+        if velocity_cols:
+            params.update(velocity_median)
 
     X_new = pd.DataFrame([params])
-    proba = pipeline.predict_proba(X_new)[0]
-    fraud, genuine = float(proba[0]), float(proba[1])
+    # One encoding pass serves the primary, the shadow candidate and explain
+    proba, Z = shadow.score(pipeline, X_new, "predict")
+    explanation = None
+    if explain:
+        names, values = top_contributions(contributions(pipeline, Z), feature_labels)
+        explanation = [
+            FeatureContribution(feature=n, contribution=float(v))
+            for n, v in zip(names[0], values[0])
+        ]
+    fraud, genuine = float(proba[0][0]), float(proba[0][1])
     label = "Genuine Claim" if genuine >= fraud else "Fraud Claim"
 
     return ClaimResponse(
         genuine_probability=genuine,
         fraud_probability=fraud,
-        predicted_label=label
+        predicted_label=label,
+        explanation=explanation
     )
 
+# ── Shadow model statistics ────────────────────
+@app.get("/shadow")
+def get_shadow_stats():
+    return shadow.snapshot()
+
+@app.delete("/shadow")
+def reset_shadow_stats():
+    shadow.reset()
+    return shadow.snapshot()
+
 # ── Default summary endpoint ───────────────────
-@app.get("/summary", response_class=PlainTextResponse)
-def get_summary():
-    if not SUMMARY_PATH.exists():
-        raise HTTPException(status_code=404, detail="Summary file not found")
-    return SUMMARY_PATH.read_text(encoding="utf-8")
+# `format=json` returns the same metrics as a JSON object; text stays the default.
+@app.get("/summary", response_class=Response, responses=SUMMARY_RESPONSES)
+def get_summary(request: Request, fmt: str = Query("text", alias="format")):
+    return summary_response(SUMMARY_PATH, fmt, request)
 
 # ── Upload & Summarize ─────────────────────────
-@app.post("/summary/upload", response_class=PlainTextResponse)
-def upload_and_summarize(file: UploadFile = File(...)):
-    upload_dir = BASE_DIR / "data" / "uploads"
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    dest_path = upload_dir / file.filename
+@app.post("/summary/upload", response_class=Response, responses=SUMMARY_RESPONSES)
+def upload_and_summarize(file: UploadFile = File(...), fmt: str = Query("text", alias="format"),
+                         explain: bool = False, compression: Optional[str] = None):
+    if compression is not None and compression not in COMPRESSION_SUFFIXES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"compression must be one of {', '.join(COMPRESSION_SUFFIXES)}"
+        )
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    dest_path = UPLOAD_DIR / file.filename
 
-    # Save the CSV
+    # Save the upload as received; compressed files stay compressed on disk
     with dest_path.open("wb") as out:
         shutil.copyfileobj(file.file, out)
 
     # Run the testing logic and capture any exception
     try:
         from testing import test
-        test(str(dest_path))
+        scoring = test(str(dest_path), explain=explain, compression=compression)
+    except UploadValidationError as e:
+        # Schema/value problems are the client's to fix: no traceback
+        raise HTTPException(status_code=422, detail={"errors": e.problems})
     except Exception as e:
         tb = traceback.format_exc()
         raise HTTPException(status_code=500, detail=f"{str(e)}\n\n{tb}")
 
     # Build the summary path correctly
-    summary_filename = dest_path.stem + "_Prediction_summary.txt"
+    summary_filename = dataset_stem(dest_path) + "_Prediction_summary.txt"
     summary_path     = dest_path.parent / summary_filename
 
     if not summary_path.exists():
         raise HTTPException(status_code=500, detail="Summary file was not created")
-    return summary_path.read_text(encoding="utf-8")
+    return summary_response(summary_path, fmt, scoring=scoring)
 
 # ── Fetch a specific uploaded summary ─────────
-@app.get("/summary/{datasetName}", response_class=PlainTextResponse)
-def get_uploaded_summary(datasetName: str):
-    upload_dir   = BASE_DIR / "data" / "uploads"
-    summary_path = upload_dir / f"{datasetName}_Prediction_summary.txt"
-    if not summary_path.exists():
-        raise HTTPException(status_code=404, detail="Summary not found")
-    return summary_path.read_text(encoding="utf-8")
+@app.get("/summary/{datasetName}", response_class=Response, responses=SUMMARY_RESPONSES)
+def get_uploaded_summary(datasetName: str, request: Request,
+                         fmt: str = Query("text", alias="format")):
+    summary_path = UPLOAD_DIR / f"{datasetName}_Prediction_summary.txt"
+    return summary_response(summary_path, fmt, request)
@@ -0,0 +1,13 @@
+"""
+Compression helpers for uploads. They live in src/compressed_csv.py, shared
+with src/testing.py, and are re-exported here for the backend modules.
+"""
+import sys
+from pathlib import Path
+
+# Appended, not prepended: src/ has its own testing.py that must not shadow ours
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+from compressed_csv import (  # noqa: E402,F401
+    COMPRESSION_SUFFIXES, MAGIC_BYTES, dataset_stem, open_upload, results_path,
+    sniff_compression,
+)
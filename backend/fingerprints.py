@@ -0,0 +1,221 @@
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+_version_cache = {}
+
+
+def model_version(pipeline_path: Path) -> str:
+    """16-hex-char digest of the pipeline artifact, cached per file mtime."""
+    st = os.stat(pipeline_path)
+    key = (str(pipeline_path), st.st_mtime_ns, st.st_size)
+    if key not in _version_cache:
+        h = hashlib.sha1()
+        with open(pipeline_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        _version_cache[key] = h.hexdigest()[:16]
+    return _version_cache[key]
+
+
+def row_fingerprints(X: pd.DataFrame, version: str) -> np.ndarray:
+    """uint64 hash of each model-input row, salted with the model version.
+
+    X must be the exact frame handed to predict_proba (after imputation), so
+    two rows with equal fingerprints are guaranteed equal predictions.
+    """
+    X = X.copy()
+    for c in X.columns:
+        # 41 and 41.0 score identically; hash them identically too.
+        if pd.api.types.is_numeric_dtype(X[c]):
+            X[c] = X[c].astype("float64")
+    return pd.util.hash_pandas_object(X, index=False, hash_key=version).to_numpy()
+
+
+MAX_POLICIES = 200_000
+# The store is only a cache: losing the last SAVE_INTERVAL seconds of it on a
+# crash costs a rescore of those rows, not a wrong answer.
+SAVE_INTERVAL = 30.0
+
+
+class FingerprintStore:
+    """policy_id → (row fingerprint, predicted probabilities), persisted with joblib.
+
+    Bounded to `max_policies` entries; the least recently uploaded policies
+    are evicted first. `lock` guards only the in-memory table: callers take it
+    around lookup()/update() and score and save() outside it. update() swaps
+    in a new table rather than mutating it, so save() can write a snapshot
+    without blocking other uploads.
+    """
+
+    COLUMNS = ["fp", "p_fraud", "p_genuine"]
+
+    def __init__(self, path: Path, max_policies: int = MAX_POLICIES):
+        self.path = Path(path)
+        self.max_policies = max_policies
+        self.lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._version = 0
+        self._saved_version = 0
+        self._saved_at = float("-inf")
+        if self.path.exists():
+            self.table = joblib.load(self.path)
+        else:
+            self.table = pd.DataFrame(
+                {"fp": pd.Series(dtype="uint64"),
+                 "p_fraud": pd.Series(dtype="float64"),
+                 "p_genuine": pd.Series(dtype="float64")},
+                index=pd.Index([], name="policy_id", dtype=object),
+            )
+
+    def lookup(self, policy_ids, fps):
+        """Return (hit mask, cached proba array) for each input row."""
+        pos = self.table.index.get_indexer(pd.Index(policy_ids))
+        found = pos >= 0
+        pos = np.where(found, pos, 0)
+        if len(self.table):
+            stored = self.table["fp"].to_numpy(dtype="uint64")[pos]
+            proba = self.table[["p_fraud", "p_genuine"]].to_numpy(dtype="float64")[pos]
+        else:
+            stored = np.zeros(len(pos), dtype="uint64")
+            proba = np.zeros((len(pos), 2))
+        hit = found & (stored == fps)
+        return hit, proba
+
+    def update(self, policy_ids, fps, proba):
+        """Upsert rows (moving them to the most-recent end) and evict the oldest."""
+        new = pd.DataFrame(
+            {"fp": np.asarray(fps, dtype="uint64"),
+             "p_fraud": proba[:, 0],
+             "p_genuine": proba[:, 1]},
+            index=pd.Index(policy_ids, name="policy_id", dtype=object),
+        )
+        new = new[~new.index.duplicated(keep="last")]
+        table = self.table.drop(new.index, errors="ignore")
+        table = pd.concat([table, new])
+        if len(table) > self.max_policies:
+            table = table.iloc[-self.max_policies:]
+        self.table = table
+        self._version += 1
+
+    def save(self):
+        """Persist the current table; call without holding `lock`."""
+        with self._save_lock:
+            with self.lock:
+                table, version = self.table, self._version
+            if version <= self._saved_version:
+                return    # a concurrent save already wrote this or a newer table
+            # Write-then-rename so a crash never leaves a truncated store behind.
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            joblib.dump(table, tmp)
+            os.replace(tmp, self.path)
+            self._saved_version = version
+            self._saved_at = time.monotonic()
+
+    def save_if_due(self, interval: float = SAVE_INTERVAL):
+        """save() unless the last write was less than `interval` seconds ago.
+
+        Every write dumps the whole table, so uploads arriving in a burst
+        share one write; the caller flushes the rest at exit with save().
+        """
+        if time.monotonic() - self._saved_at >= interval:
+            self.save()
+
+
+def benchmark(data_path: str, repeat: int = 5, changed: float = 0.2, seed: int = 42) -> dict:
+    """Time test() with and without the store and check reuse is exact.
+
+    Scenarios: a full rescore, a cold store, the same upload against a warm
+    store, and a warm store after editing Driver age on `changed` of the
+    rows. Every reuse run's summary and results CSV must equal a full
+    rescore of the same file, otherwise AssertionError.
+    """
+    from testing import test
+
+    rng = np.random.default_rng(seed)
+    with tempfile.TemporaryDirectory(prefix="fingerprint_bench_") as tmp:
+        tmp = Path(tmp)
+        base = pd.read_csv(data_path)
+        edited = base.copy()
+        rows = rng.random(len(edited)) < changed
+        edited.loc[rows, "Driver age"] = rng.integers(18, 91, rows.sum())
+        base.to_csv(tmp / "base.csv", index=False)
+        edited.to_csv(tmp / "edited.csv", index=False)
+
+        def run(name, **kwargs):
+            with contextlib.redirect_stdout(io.StringIO()):
+                t0 = time.perf_counter()
+                stats = test(str(tmp / f"{name}.csv"), **kwargs)
+                elapsed = time.perf_counter() - t0
+            outputs = tuple(
+                (tmp / f"{name}_{kind}").read_text(encoding="utf-8")
+                for kind in ("Prediction_summary.txt", "Results.csv")
+            )
+            return elapsed, outputs, stats
+
+        def fresh_store():
+            path = tmp / "store.joblib"
+            if path.exists():
+                path.unlink()
+            return FingerprintStore(path)
+
+        expected = {name: run(name, reuse=False)[1] for name in ("base", "edited")}
+        times = {k: [] for k in ("full", "cold", "warm", "changed")}
+        for _ in range(repeat):
+            times["full"].append(run("base", reuse=False)[0])
+
+            store = fresh_store()
+            elapsed, outputs, _ = run("base", store=store)
+            assert outputs == expected["base"], "cold-store results differ from a full rescore"
+            times["cold"].append(elapsed)
+
+            elapsed, outputs, warm = run("base", store=store)
+            assert outputs == expected["base"], "warm-store results differ from a full rescore"
+            times["warm"].append(elapsed)
+
+            elapsed, outputs, edit = run("edited", store=store)
+            assert outputs == expected["edited"], "partial-reuse results differ from a full rescore"
+            times["changed"].append(elapsed)
+
+        t0 = time.perf_counter()
+        joblib.dump(store.table, tmp / "dump.joblib")
+        save = time.perf_counter() - t0
+
+    result = {f"{k}_ms": min(v) * 1000 for k, v in times.items()}
+    result.update({
+        "rows":              len(base),
+        "warm_reuse_ratio":  warm["reuse_ratio"],
+        "changed_reuse_ratio": edit["reuse_ratio"],
+        "save_ms":           save * 1000,
+        "store_rows":        len(store.table),
+    })
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check incremental rescoring against a full rescore and time both.")
+    parser.add_argument("data_path")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--changed", type=float, default=0.2,
+                        help="fraction of rows edited for the partial-reuse run")
+    args = parser.parse_args()
+
+    r = benchmark(args.data_path, args.repeat, args.changed)
+    print(f"Rows:                 {r['rows']}  (summaries and results match a full rescore)")
+    print(f"Full rescore:         {r['full_ms']:.1f} ms")
+    print(f"Cold store:           {r['cold_ms']:.1f} ms  (includes one store write)")
+    print(f"Warm store:           {r['warm_ms']:.1f} ms  (reuse {r['warm_reuse_ratio']:.1%})")
+    print(f"Warm, {args.changed:.0%} edited:     {r['changed_ms']:.1f} ms  "
+          f"(reuse {r['changed_reuse_ratio']:.1%})")
+    print(f"Store write:          {r['save_ms']:.1f} ms  ({r['store_rows']} rows)")
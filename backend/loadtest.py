@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Local load generator for the Insurance Fraud Detection API
+ - starts app.py under uvicorn on a free local port (or targets --url)
+ - replays a weighted mix of /predict, /predict?explain=true, /record and
+   /summary/upload requests built from rows of Testing_10000_dataset.csv
+ - closed-loop (--concurrency) or open-loop (--rate) load
+ - reports throughput and p50/p95/p99 latency per endpoint, saved to JSON
+
+Usage (from the backend/ directory):
+    python loadtest.py --concurrency 32 --duration 30
+    python loadtest.py --rate 200 --duration 60 --mix predict=8,record=2,upload=0
+    python loadtest.py --mix predict=1,explain=1     # explain-mode overhead
+    python loadtest.py --url http://host:8000        # no uploads against a real instance
+
+Needs httpx and uvicorn (see requirements.txt).
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+# ── Paths & Defaults ────────────────────
+HERE        = Path(__file__).parent
+BASE_DIR    = HERE.parent
+DATA_PATH   = BASE_DIR / "data" / "Testing_10000_dataset.csv"
+OUTPUT_PATH = BASE_DIR / "data" / "loadtest_results.json"
+UPLOAD_DIR  = BASE_DIR / "data" / "uploads"
+
+DEFAULT_MIX      = "predict=8,record=2,upload=1"
+# Uploads write files (and fingerprint entries) into the server's data/, so
+# they only run against the throwaway local instance.
+DEFAULT_URL_MIX  = "predict=8,record=2"
+ENDPOINTS        = ("predict", "explain", "record", "upload")
+UPLOAD_ROWS      = 500
+UPLOAD_CHANGED   = 0.2
+UPLOAD_PREFIX    = "loadtest_upload_"
+STARTUP_TIMEOUT  = 60.0
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open.
+HISTOGRAM_BOUNDS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+# ── Request builders ────────────────────
+def load_rows(data_path: Path):
+    """Read the CSV once as a list of dicts plus its header."""
+    with open(data_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        return reader.fieldnames, list(reader)
+
+
+def build_predict(rows, rng):
+    r = rng.choice(rows)
+    body = {
+        "policy_status":      r["Policy status"],
+        "license":            r["License"],
+        "driver_age":         int(r["Driver age"]),
+        "drunk_driving":      r["drunk driving"],
+        "fir_filed":          r["FIR filed?"],
+        "no_previous_claims": int(r["No. of previous claims"]),
+        "time_of_incident":   r["Time of incident"],
+        "time_of_claim":      r["Time of claim"],
+    }
+    return "predict", {"method": "POST", "url": "/predict", "json": body}
+
+
+def build_explain(rows, rng):
+    _, request = build_predict(rows, rng)
+    request["params"] = {"explain": "true"}
+    return "explain", request
+
+
+def build_record(rows, rng):
+    r = rng.choice(rows)
+    return "record", {"method": "GET", "url": f"/record/{r['policy_id']}"}
+
+
+def build_upload_factory(header, rows, n_rows, changed):
+    """Upload builder: a random slice per request with a fraction of rows edited.
+
+    Editing `changed` of the rows (Driver age) keeps the incremental-rescoring
+    cache from turning every upload into a 100% hit after the first one.
+    """
+    counter = iter(range(1 << 62))
+
+    def build_upload(_rows, rng):
+        start = rng.randrange(max(len(rows) - n_rows, 1))
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=header)
+        writer.writeheader()
+        for r in rows[start:start + n_rows]:
+            if rng.random() < changed:
+                r = {**r, "Driver age": str(rng.randint(18, 90))}
+            writer.writerow(r)
+        # Unique names keep concurrent uploads from clobbering each other's files.
+        name  = f"{UPLOAD_PREFIX}{next(counter)}.csv"
+        files = {"file": (name, buf.getvalue().encode("utf-8"), "text/csv")}
+        return "upload", {"method": "POST", "url": "/summary/upload", "files": files}
+    return build_upload
+
+
+def parse_mix(spec: str):
+    """Parse 'predict=8,record=2,upload=1' into {name: weight}."""
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in mix: {name!r}")
+        mix[name] = float(weight or 1)
+    if not any(w > 0 for w in mix.values()):
+        raise ValueError("Request mix has no positive weights")
+    return mix
+
+# ── Stats ───────────────────────────────
+def percentile(sorted_vals, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_vals:
+        return None
+    k = max(math.ceil(q / 100 * len(sorted_vals)) - 1, 0)
+    return sorted_vals[k]
+
+
+def histogram(latencies_ms):
+    counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+    for v in latencies_ms:
+        for i, bound in enumerate(HISTOGRAM_BOUNDS):
+            if v <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    labels = [f"<={b}ms" for b in HISTOGRAM_BOUNDS] + [f">{HISTOGRAM_BOUNDS[-1]}ms"]
+    return dict(zip(labels, counts))
+
+
+def summarize(samples, elapsed):
+    """Aggregate (endpoint, status, latency_ms) samples into a report dict."""
+    by_endpoint = defaultdict(list)
+    for endpoint, status, latency in samples:
+        by_endpoint[endpoint].append((status, latency))
+    by_endpoint["all"] = [(s, l) for _, s, l in samples]
+
+    report = {}
+    for endpoint, items in by_endpoint.items():
+        lat = sorted(l for _, l in items)
+        statuses = defaultdict(int)
+        for s, _ in items:
+            statuses[str(s)] += 1
+        ok = sum(1 for s, _ in items if isinstance(s, int) and s < 400)
+        report[endpoint] = {
+            "requests":       len(items),
+            "ok":             ok,
+            "errors":         len(items) - ok,
+            "throughput_rps": len(items) / elapsed if elapsed else 0.0,
+            "latency_ms": {
+                "min":  lat[0] if lat else None,
+                "mean": sum(lat) / len(lat) if lat else None,
+                "p50":  percentile(lat, 50),
+                "p95":  percentile(lat, 95),
+                "p99":  percentile(lat, 99),
+                "max":  lat[-1] if lat else None,
+            },
+            "histogram":      histogram(lat),
+            "status_codes":   dict(statuses),
+        }
+    return report
+
+# ── Load generation ─────────────────────
+async def send(client, request, samples, endpoint):
+    t0 = time.perf_counter()
+    try:
+        resp = await client.request(**request)
+        status = resp.status_code
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    samples.append((endpoint, status, (time.perf_counter() - t0) * 1000.0))
+
+
+async def run_closed_loop(client, pick, concurrency, deadline, max_requests, samples):
+    """Keep `concurrency` requests in flight until the deadline or budget."""
+    issued = 0
+
+    async def worker():
+        nonlocal issued
+        while time.perf_counter() < deadline and (max_requests is None or issued < max_requests):
+            issued += 1
+            endpoint, request = pick()
+            await send(client, request, samples, endpoint)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def run_open_loop(client, pick, rate, deadline, max_requests, samples):
+    """Issue requests on a fixed schedule regardless of response times."""
+    interval = 1.0 / rate
+    tasks = []
+    next_at = time.perf_counter()
+    while time.perf_counter() < deadline and (max_requests is None or len(tasks) < max_requests):
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        endpoint, request = pick()
+        tasks.append(asyncio.create_task(send(client, request, samples, endpoint)))
+        next_at += interval
+    await asyncio.gather(*tasks)
+
+
+async def run_load(args, base_url):
+    rng = random.Random(args.seed)
+    header, rows = load_rows(Path(args.data))
+    mix = parse_mix(args.mix)
+    builders = {
+        "predict": build_predict,
+        "explain": build_explain,
+        "record":  build_record,
+        "upload":  build_upload_factory(header, rows, args.upload_rows, args.upload_changed),
+    }
+    names   = [n for n, w in mix.items() if w > 0]
+    weights = [mix[n] for n in names]
+
+    def pick():
+        name = rng.choices(names, weights)[0]
+        return builders[name](rows, rng)
+
+    limits  = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    timeout = httpx.Timeout(args.timeout)
+    samples = []
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        # Warm-up requests are excluded from the report.
+        for _ in range(args.warmup):
+            endpoint, request = pick()
+            await send(client, request, [], endpoint)
+
+        start = time.perf_counter()
+        deadline = start + args.duration
+        if args.rate:
+            await run_open_loop(client, pick, args.rate, deadline, args.requests, samples)
+        else:
+            await run_closed_loop(client, pick, args.concurrency, deadline, args.requests, samples)
+        elapsed = time.perf_counter() - start
+
+    return samples, elapsed
+
+# ── Local server ────────────────────────
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, store_path):
+    """Launch app.py under uvicorn and block until it accepts connections.
+
+    The server gets its own fingerprint store so load-test uploads never
+    touch the production one.
+    """
+    env = {**os.environ, "FINGERPRINT_STORE_PATH": str(store_path)}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=str(HERE),
+        env=env,
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn exited early with code {proc.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("Timed out waiting for the API to start")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the fraud detection API.")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=16,
+                      help="requests kept in flight (closed loop, default 16)")
+    load.add_argument("--rate", type=float,
+                      help="target requests per second (open loop)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of measured load")
+    parser.add_argument("--requests", type=int, help="stop after this many requests")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests sent first")
+    parser.add_argument("--mix", help=f"endpoint weights (default {DEFAULT_MIX}, "
+                                      f"or {DEFAULT_URL_MIX} with --url)")
+    parser.add_argument("--upload-rows", type=int, default=UPLOAD_ROWS, help="rows per upload CSV")
+    parser.add_argument("--upload-changed", type=float, default=UPLOAD_CHANGED,
+                        help=f"fraction of upload rows edited per request (default {UPLOAD_CHANGED})")
+    parser.add_argument("--data", default=str(DATA_PATH), help="CSV used to build requests")
+    parser.add_argument("--url", help="target a running instance instead of starting one")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout (s)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=str(OUTPUT_PATH), help="where to write the JSON report")
+    args = parser.parse_args(argv)
+    args.mix = args.mix or (DEFAULT_URL_MIX if args.url else DEFAULT_MIX)
+    if args.url and parse_mix(args.mix).get("upload", 0) > 0:
+        parser.error("uploads are only sent to the local instance; drop upload from --mix with --url")
+
+    proc = None
+    scratch = tempfile.TemporaryDirectory(prefix="loadtest_")
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        port = free_port()
+        proc = start_server(port, Path(scratch.name) / "policy_fingerprints.joblib")
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        samples, elapsed = asyncio.run(run_load(args, base_url))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+            for p in UPLOAD_DIR.glob(f"{UPLOAD_PREFIX}*"):
+                p.unlink()
+        scratch.cleanup()
+
+    results = {
+        "config": {
+            "target":      base_url,
+            "mode":        "rate" if args.rate else "concurrency",
+            "rate":        args.rate,
+            "concurrency": None if args.rate else args.concurrency,
+            "duration_s":  args.duration,
+            "mix":         parse_mix(args.mix),
+            "upload_rows": args.upload_rows,
+            "upload_changed": args.upload_changed,
+        },
+        "elapsed_s": elapsed,
+        "endpoints": summarize(samples, elapsed),
+    }
+    Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    print(f"{'endpoint':<10}{'reqs':>8}{'errors':>8}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, s in results["endpoints"].items():
+        lat = s["latency_ms"]
+        fmt = lambda v: f"{v:.1f}" if v is not None else "-"
+        print(f"{name:<10}{s['requests']:>8}{s['errors']:>8}{s['throughput_rps']:>10.1f}"
+              f"{fmt(lat['p50']):>10}{fmt(lat['p95']):>10}{fmt(lat['p99']):>10}")
+    print("📄 Report:", Path(args.output).absolute().as_uri())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Shadow scoring: run a candidate pipeline next to the production one on the
+same prepared batch and collect agreement statistics without affecting the
+returned predictions.
+
+Enable by pointing SHADOW_PIPELINE_PATH at a candidate .joblib artifact.
+Date parsing and imputation happen once in the caller; if the candidate's
+fitted preprocessor is identical to the primary's, the encoded matrix is
+shared too and only the candidate classifier runs. The candidate is scored
+on a background thread, so shadow mode adds only a queue put to the
+request path.
+"""
+import os
+import queue
+import threading
+import weakref
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from explain import split_pipeline
+
+SHADOW_PIPELINE_ENV = "SHADOW_PIPELINE_PATH"
+# Queued items hold whole input batches, so keep the backlog short.
+QUEUE_SIZE = 64
+# Upper bounds of the |P(genuine) delta| histogram buckets.
+DELTA_BOUNDS = [0.01, 0.05, 0.1, 0.25, 0.5, 1.0]
+LABELS = ("Fraud Claim", "Genuine Claim")
+
+
+def genuine_mask(proba) -> np.ndarray:
+    """Same decision rule as the scoring paths: genuine iff P(genuine) >= P(fraud)."""
+    return proba[:, 1] >= proba[:, 0]
+
+
+class ShadowStats:
+    """Running agreement / delta / confusion counters for one traffic source."""
+
+    def __init__(self):
+        self.rows = 0
+        self.agree = 0
+        self.sum_delta = 0.0
+        self.sum_abs_delta = 0.0
+        self.max_abs_delta = 0.0
+        self.delta_hist = np.zeros(len(DELTA_BOUNDS), dtype="int64")
+        # confusion[primary][shadow], index 0 = fraud, 1 = genuine
+        self.confusion = np.zeros((2, 2), dtype="int64")
+
+    def add(self, primary_proba, shadow_proba):
+        p_lab = genuine_mask(primary_proba).astype(int)
+        s_lab = genuine_mask(shadow_proba).astype(int)
+        delta = shadow_proba[:, 1] - primary_proba[:, 1]
+        abs_delta = np.abs(delta)
+
+        self.rows += len(delta)
+        self.agree += int((p_lab == s_lab).sum())
+        self.sum_delta += float(delta.sum())
+        self.sum_abs_delta += float(abs_delta.sum())
+        if len(delta):
+            self.max_abs_delta = max(self.max_abs_delta, float(abs_delta.max()))
+        idx = np.minimum(np.searchsorted(DELTA_BOUNDS, abs_delta), len(DELTA_BOUNDS) - 1)
+        self.delta_hist += np.bincount(idx, minlength=len(DELTA_BOUNDS))
+        np.add.at(self.confusion, (p_lab, s_lab), 1)
+
+    def to_dict(self) -> dict:
+        n = self.rows
+        return {
+            "rows":           n,
+            "agreement_rate": self.agree / n if n else None,
+            "disagreements":  n - self.agree,
+            "mean_delta":     self.sum_delta / n if n else None,
+            "mean_abs_delta": self.sum_abs_delta / n if n else None,
+            "max_abs_delta":  self.max_abs_delta,
+            "abs_delta_histogram": {
+                f"<={b}": int(c) for b, c in zip(DELTA_BOUNDS, self.delta_hist)
+            },
+            "confusion": {
+                f"primary {LABELS[i]} / shadow {LABELS[j]}": int(self.confusion[i, j])
+                for i in range(2) for j in range(2)
+            },
+        }
+
+
+class ShadowScorer:
+    """Scores batches with the primary pipeline and, if configured, a candidate."""
+
+    def __init__(self, candidate_path=None):
+        self.candidate_path = Path(candidate_path) if candidate_path else None
+        self.candidate = joblib.load(self.candidate_path) if self.candidate_path else None
+        # The candidate's side of the preprocessor comparison, hashed once
+        self._candidate_pre = (
+            joblib.hash(split_pipeline(self.candidate)[0]) if self.candidate is not None else None
+        )
+        self._shared = weakref.WeakKeyDictionary()
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._dropped = 0
+        self._failed = 0
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        if self.candidate is not None:
+            threading.Thread(target=self._drain, name="shadow-stats", daemon=True).start()
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get(SHADOW_PIPELINE_ENV) or None)
+
+    @property
+    def enabled(self) -> bool:
+        return self.candidate is not None
+
+    def features(self) -> list:
+        """Input columns the candidate needs (empty when disabled)."""
+        if self.candidate is None:
+            return []
+        return list(getattr(self.candidate, "feature_names_in_", []))
+
+    def shares_preprocessor(self, primary) -> bool:
+        """True if the candidate's fitted preprocessor equals the primary's.
+
+        Cached per primary pipeline object, so callers should keep the loaded
+        pipeline around (see testing.load_pipeline) rather than reload it.
+        """
+        if self.candidate is None:
+            return False
+        if primary not in self._shared:
+            self._shared[primary] = joblib.hash(split_pipeline(primary)[0]) == self._candidate_pre
+        return self._shared[primary]
+
+    def score(self, primary, X, source: str):
+        """Return (primary proba, encoded X) and queue the shadow comparison."""
+        pre, clf = split_pipeline(primary)
+        Z = pre.transform(X)
+        proba = clf.predict_proba(Z)
+        self.observe(primary, X, proba, source, Z)
+        return proba, Z
+
+    def observe(self, primary, X, proba, source: str, Z=None):
+        """Queue X for candidate scoring against the primary `proba`.
+
+        Pass the primary's encoded matrix `Z` to skip re-encoding when the
+        preprocessors match. The candidate runs on the drain thread; a full
+        queue drops the batch. X=None (the caller could not build the
+        candidate's input) counts as a failed batch. A no-op when shadow mode
+        is off.
+        """
+        if self.candidate is None:
+            return
+        shared = Z is not None and self.shares_preprocessor(primary)
+        if X is None and not shared:
+            with self._lock:
+                self._failed += 1
+            return
+        item = (source, np.asarray(proba), Z if shared else X, shared)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+
+    def _drain(self):
+        _, candidate_clf = split_pipeline(self.candidate)
+        while True:
+            source, primary_proba, batch, shared = self._queue.get()
+            try:
+                if shared:
+                    shadow_proba = candidate_clf.predict_proba(batch)
+                else:
+                    shadow_proba = self.candidate.predict_proba(batch)
+            except Exception:
+                # A broken candidate must not take the stats thread down
+                with self._lock:
+                    self._failed += 1
+                continue
+            with self._lock:
+                for key in (source, "all"):
+                    self._stats.setdefault(key, ShadowStats()).add(primary_proba, shadow_proba)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = {k: s.to_dict() for k, s in self._stats.items()}
+            dropped = self._dropped
+            failed = self._failed
+        return {
+            "enabled":   self.enabled,
+            "candidate": str(self.candidate_path) if self.candidate_path else None,
+            "pending":   self._queue.qsize(),
+            "dropped_batches": dropped,
+            "failed_batches":  failed,
+            "stats":     stats,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._dropped = 0
+            self._failed = 0
+
+
+shadow = ShadowScorer.from_env()
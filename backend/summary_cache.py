@@ -0,0 +1,118 @@
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+
+# Summary line label → JSON key. Both wordings of the accuracy line exist in
+# the summaries written by the different versions of test().
+FIELD_KEYS = {
+    "Total Records":              "total_records",
+    "Rejected Rows":              "rejected_rows",
+    "Actual Genuine Claims":      "actual_genuine",
+    "Predicted Genuine Claims":   "predicted_genuine",
+    "Actual Fraud Claims":        "actual_fraud",
+    "Predicted Fraud Claims":     "predicted_fraud",
+    "Correctly Predicted":        "correct",
+    "Incorrectly Predicted":      "incorrect",
+    "Genuine → Fraud":            "genuine_as_fraud",
+    "Fraud → Genuine":            "fraud_as_genuine",
+    "Accuracy of the Model is":   "accuracy_pct",
+    "Accuracy of the Model":      "accuracy_pct",
+}
+
+MAX_ENTRIES = 256
+# 'claims_Prediction_summary.txt' → 'claims'; the default 'Prediction_Summary.txt' → ''
+_SUMMARY_SUFFIX = re.compile(r"_?prediction_summary\.txt$", re.IGNORECASE)
+
+
+def parse_summary(text: str) -> dict:
+    """Turn a '<Label>: <value>' summary TXT into a flat dict of metrics."""
+    metrics = {}
+    for line in text.splitlines():
+        label, sep, value = line.partition(":")
+        if not sep:
+            continue
+        label = label.strip()
+        key = FIELD_KEYS.get(label) or label.lower().replace(" ", "_")
+        value = value.strip().rstrip("%")
+        try:
+            metrics[key] = int(value)
+        except ValueError:
+            try:
+                metrics[key] = float(value)
+            except ValueError:
+                metrics[key] = value
+    return metrics
+
+
+class SummaryEntry:
+    """One summary file rendered as text and JSON, with its HTTP validators."""
+
+    def __init__(self, path: Path, text: str, mtime: float):
+        self.text = text
+        self.json = json.dumps(
+            {"dataset": _SUMMARY_SUFFIX.sub("", path.name) or None,
+             **parse_summary(text)}
+        )
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:20]
+        self.etags = {"text": f'"{digest}"', "json": f'"{digest}-json"'}
+        self.mtime = mtime
+        self.last_modified = formatdate(mtime, usegmt=True)
+
+    def body(self, fmt: str) -> str:
+        return self.json if fmt == "json" else self.text
+
+    def headers(self, fmt: str) -> dict:
+        # no-cache lets clients keep a copy but forces revalidation via ETag.
+        return {
+            "ETag":          self.etags[fmt],
+            "Last-Modified": self.last_modified,
+            "Cache-Control": "no-cache",
+        }
+
+    def not_modified(self, fmt: str, if_none_match, if_modified_since) -> bool:
+        """Evaluate conditional request headers (If-None-Match wins)."""
+        if if_none_match:
+            tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+            return "*" in tags or self.etags[fmt] in tags
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.mtime) <= since
+        return False
+
+
+class SummaryCache:
+    """In-process LRU of summary files, invalidated by file mtime and size."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._max = max_entries
+
+    def get(self, path: Path) -> SummaryEntry:
+        """Return the cached entry, re-reading the file only if it changed.
+
+        Raises FileNotFoundError if the summary does not exist.
+        """
+        st = path.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+        key = str(path)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == stamp:
+                self._entries.move_to_end(key)
+                return cached[1]
+
+        entry = SummaryEntry(path, path.read_text(encoding="utf-8"), st.st_mtime)
+        with self._lock:
+            self._entries[key] = (stamp, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max:
+                self._entries.popitem(last=False)
+        return entry
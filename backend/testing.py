@@ -1,12 +1,61 @@
+import atexit
+import json
+import os
+import threading
+import numpy as np
 import pandas as pd
 import joblib
 from datetime import datetime
 from pathlib import Path
 
+from compression import dataset_stem, open_upload, results_path
+from explain import contributions, explanation_frame, feature_names, split_pipeline
+from fingerprints import FingerprintStore, model_version, row_fingerprints
+from shadow import shadow
+from validation import (
+    IMPUTED_VALUES, ErrorReport, UploadValidationError, check_rows, encoder_categories,
+    find_claim_status_column, validate_upload,
+)
+from velocity import VELOCITY_FEATURES, stream_velocity_features
+
 # Resolve the pipeline path relative to this file
 HERE = Path(__file__).parent
 SRC = HERE.parent / "src"
 PIPELINE_PATH = SRC / "fraud_detection_pipeline.joblib"
+# FINGERPRINT_STORE_PATH lets throwaway runs (e.g. loadtest.py) use their own store
+FINGERPRINT_PATH = Path(os.environ.get(
+    "FINGERPRINT_STORE_PATH",
+    HERE.parent / "data" / "uploads" / "policy_fingerprints.joblib",
+))
+
+_store = None
+_store_lock = threading.Lock()
+
+def fingerprint_store() -> FingerprintStore:
+    """Process-wide policy_id fingerprint store, loaded on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            FINGERPRINT_PATH.parent.mkdir(parents=True, exist_ok=True)
+            _store = FingerprintStore(FINGERPRINT_PATH)
+            atexit.register(_store.save)   # flush what save_if_due() deferred
+    return _store
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+def load_pipeline():
+    """(model version, pipeline), reloaded only when the artifact changes.
+
+    Reusing the object across uploads also lets per-pipeline caches (e.g.
+    the shadow scorer's preprocessor comparison) hit.
+    """
+    global _pipeline
+    version = model_version(PIPELINE_PATH)
+    with _pipeline_lock:
+        if _pipeline is None or _pipeline[0] != version:
+            _pipeline = (version, joblib.load(PIPELINE_PATH))
+        return _pipeline
 
 def parse_date(dt_str):
     s = str(dt_str).strip()
@@ -29,58 +78,156 @@ def parse_date(dt_str):
     except Exception:
         return pd.NaT
 
-def test(data_path: str):
+def parse_dates(values: pd.Series) -> pd.Series:
+    """parse_date over a column, called once per distinct value."""
+    uniq = values.dropna().unique()
+    return pd.to_datetime(values.map(dict(zip(uniq, map(parse_date, uniq)))))
+
+FEATURES = [
+    'Policy status',
+    'License',
+    'Driver age',
+    'drunk driving',
+    'FIR filed?',
+    'No. of previous claims',
+    'time_diff_hrs'
+]
+
+def model_features(pipeline) -> list:
+    """Input columns the pipeline was fitted on (FEATURES for older artifacts)."""
+    names = getattr(pipeline, 'feature_names_in_', None)
+    return list(names) if names is not None else list(FEATURES)
+
+def prepare_features(df: pd.DataFrame, features=FEATURES) -> pd.DataFrame:
+    """Parse the timestamp columns of `df` in place and return the imputed model input.
+
+    Columns already parsed by check_rows() are left as they are. Claim-velocity
+    columns are computed only if `features` asks for them, by streaming the
+    rows through a VelocityTracker in claim-time order.
+    """
+    for col in ('Time of incident', 'Time of claim'):
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = parse_dates(df[col])
+    df['time_diff_hrs']    = (
+        df['Time of claim'] - df['Time of incident']
+    ).dt.total_seconds() / 3600
+    if any(c in VELOCITY_FEATURES for c in features):
+        df[VELOCITY_FEATURES] = stream_velocity_features(df, 'Time of claim')
+
+    X_new = df[list(features)].copy()
+    fills = {
+        **IMPUTED_VALUES,
+        'Driver age':             df['Driver age'].median(),
+        'No. of previous claims': 0,
+        'time_diff_hrs':          df['time_diff_hrs'].median(),
+    }
+    return X_new.fillna({c: v for c, v in fills.items() if c in X_new.columns})
+
+def shadow_features(df: pd.DataFrame, X_new: pd.DataFrame):
+    """The shadow candidate's input for an upload, or None if it can't be built.
+
+    Columns the primary already prepared are reused; anything else the
+    candidate needs is prepared best-effort, so a candidate asking for a
+    column the upload lacks never fails the primary scoring.
+    """
+    feats = shadow.features()
+    if not feats:
+        return X_new
+    if set(feats) <= set(X_new.columns):
+        return X_new[feats]
+    try:
+        return prepare_features(df, feats)
+    except (KeyError, ValueError, TypeError):
+        return None
+
+def test(data_path: str, explain: bool = False, compression=None, reuse: bool = True,
+         store: FingerprintStore = None) -> dict:
+    """Score an upload and write its summary TXT next to it.
+
+    Rows whose policy_id and model inputs match an earlier upload (under the
+    same model artifact) reuse the cached probabilities instead of being
+    rescored; `reuse=False`, `explain` or shadow mode rescore everything
+    without touching the store, and `store` replaces the process-wide one
+    (see fingerprints.benchmark). Per-claim predictions are written to
+    <stem>_Results.csv and, with `explain`, the top feature contributions of
+    every claim to <stem>_Explanations.csv; both are compressed with
+    `compression` (e.g. 'gzip') if given. gzip/bz2/xz/zip uploads are
+    recognised by their magic bytes and decompressed while reading.
+
+    The header and first chunk are validated up front and an
+    UploadValidationError is raised for unusable files. Individual rows with
+    invalid values are skipped and listed in <stem>_Errors.json. Returns row
+    counts, the reuse ratio and the error report.
+    """
     # Support .csc extension typo
     if data_path.lower().endswith('.csc'):
         data_path = data_path[:-4] + '.csv'
     # 1) Load model
-    pipeline = joblib.load(PIPELINE_PATH)
+    version, pipeline = load_pipeline()
 
-    # 2) Read CSV
-    df = pd.read_csv(data_path)
+    # 2) Fast-fail on the header and first chunk, then read the whole file
+    # Categories come from the fitted encoder, so values (or imputed blanks)
+    # it has never seen are reported as bad rows rather than failing scoring
+    categories = encoder_categories(pipeline)
+    validate_upload(data_path, parse_date, categories)
+    with open_upload(data_path) as f:
+        df = pd.read_csv(f)
 
-    # 3) Parse times and compute time_diff_hrs
-    df['Time of incident'] = df['Time of incident'].map(parse_date)
-    df['Time of claim']    = df['Time of claim'].map(parse_date)
-    df['time_diff_hrs']    = (
-        df['Time of claim'] - df['Time of incident']
-    ).dt.total_seconds() / 3600
+    # Drop rows with invalid values instead of aborting the job
+    report = ErrorReport()
+    bad = check_rows(df, parse_date, report, categories=categories).to_numpy()
+    report.rejected_rows = int(bad.sum())
+    if report.rejected_rows == len(df):
+        raise UploadValidationError(["No valid rows to score"] + [
+            f"line {e['line']}: {e['column']} {e['reason']} ({e['value']!r})"
+            for e in report.examples[:5]
+        ])
+    df = df[~bad].reset_index(drop=True)
 
-    # 4) Prepare features and impute
-    feats = [
-        'Policy status',
-        'License',
-        'Driver age',
-        'drunk driving',
-        'FIR filed?',
-        'No. of previous claims',
-        'time_diff_hrs'
-    ]
-    X_new = df[feats].copy()
-    X_new['Policy status'].fillna('Unknown', inplace=True)
-    X_new['License'].fillna('Unknown', inplace=True)
-    X_new['drunk driving'].fillna('No', inplace=True)
-    X_new['FIR filed?'].fillna('No', inplace=True)
-    X_new['Driver age'].fillna(X_new['Driver age'].median(), inplace=True)
-    X_new['No. of previous claims'].fillna(0, inplace=True)
-    X_new['time_diff_hrs'].fillna(X_new['time_diff_hrs'].median(), inplace=True)
-
-    # 5) Predict probabilities
-    proba = pipeline.predict_proba(X_new)
+    # 3-4) Parse times, compute time_diff_hrs, select and impute features
+    X_new = prepare_features(df, model_features(pipeline))
+
+    # 5) Predict probabilities, reusing cached scores for unchanged rows.
+    # Fingerprints hash X_new after imputation, so a row whose median-imputed
+    # value shifted with this batch is treated as changed.
+    if 'policy_id' in df.columns:
+        ids = df['policy_id'].to_numpy()
+        keyed = df['policy_id'].notna().to_numpy() & reuse
+    else:
+        ids = np.arange(len(df))
+        keyed = np.zeros(len(df), dtype=bool)
+
+    # Explanations and shadow scoring need the whole batch encoded. Once it
+    # is, the classifier is a single dot product, cheaper than fingerprinting
+    # and looking rows up, so the store only serves plain scoring.
+    pre, clf = split_pipeline(pipeline)
+    Z = pre.transform(X_new) if (explain or shadow.enabled) else None
+    keyed &= Z is None
+    if keyed.any():
+        store = store if store is not None else fingerprint_store()
+        fps = row_fingerprints(X_new, version)
+        with store.lock:
+            hit, proba = store.lookup(ids, fps)
+        hit &= keyed
+    else:
+        hit, proba = np.zeros(len(df), dtype=bool), np.zeros((len(df), 2))
+    miss = ~hit
+    if miss.all():
+        proba = clf.predict_proba(Z) if Z is not None else pipeline.predict_proba(X_new)
+    elif miss.any():
+        proba[miss] = pipeline.predict_proba(X_new[miss])
+    if keyed.any():
+        with store.lock:
+            store.update(ids[keyed], fps[keyed], proba[keyed])
+        store.save_if_due()
+    if shadow.enabled:
+        shadow.observe(pipeline, shadow_features(df, X_new), proba, 'upload', Z)
 
     # 6) Build summary stats
     total = len(df)
 
-    # auto-detect original claim column name
-    orig_col = None
-    for c in df.columns:
-        if c.lower().startswith('original') and 'claim' in c.lower():
-            orig_col = c
-            break
-    if orig_col is None:
-        raise KeyError(
-            f"Could not find original-claim column in {df.columns.tolist()}"
-        )
+    # validate_upload() has already rejected files without this column
+    orig_col = find_claim_status_column(df.columns)
 
     actual_g = (df[orig_col] == 'Genuine Claim').sum()
     pred_g   = (proba[:,1] >= proba[:,0]).sum()
@@ -94,10 +241,13 @@ def test(data_path: str):
 
     # 7) Write the summary TXT next to the CSV
     data_path_obj = Path(data_path)
-    summary_path  = data_path_obj.parent / f"{data_path_obj.stem}_Prediction_summary.txt"
+    stem          = dataset_stem(data_path_obj)
+    summary_path  = data_path_obj.parent / f"{stem}_Prediction_summary.txt"
 
     with open(summary_path, 'w', encoding='utf-8') as f:
         f.write(f"Total Records: {total}\n\n")
+        if report.rejected_rows:
+            f.write(f"Rejected Rows: {report.rejected_rows}\n\n")
         f.write(f"Actual Genuine Claims: {actual_g}\n")
         f.write(f"Predicted Genuine Claims: {pred_g}\n\n")
         f.write(f"Actual Fraud Claims: {actual_f}\n")
@@ -107,3 +257,38 @@ def test(data_path: str):
         f.write(f"Accuracy of the Model is: {accuracy:.2f}%\n")
 
     print("✅ Summary written to", summary_path)
+
+    # Per-claim predictions, same columns as src/testing.py writes
+    out = df[[c for c in ('policy_id', 'Policy status', orig_col) if c in df.columns]].copy()
+    out['Model Predicted Output'] = preds
+    out_path = results_path(data_path_obj.parent, stem, "Results", compression)
+    out.to_csv(out_path, index=False, compression=compression)
+    print("📄 Results written to", out_path)
+
+    errors_path = data_path_obj.parent / f"{stem}_Errors.json"
+    if report:
+        errors_path.write_text(json.dumps(report.to_dict(), indent=2), encoding='utf-8')
+        print("⚠️ Rejected", report.rejected_rows, "rows, see", errors_path)
+    elif errors_path.exists():
+        errors_path.unlink()
+
+    # 8) Optional per-claim explanations (one matrix product for the batch)
+    if explain:
+        expl = explanation_frame(contributions(pipeline, Z), feature_names(pipeline))
+        expl.insert(0, 'fraud_probability', proba[:, 0])
+        expl.insert(0, 'Model Predicted Output', preds)
+        if 'policy_id' in df.columns:
+            expl.insert(0, 'policy_id', df['policy_id'].to_numpy())
+        expl_path = results_path(data_path_obj.parent, stem, "Explanations", compression)
+        expl.to_csv(expl_path, index=False, compression=compression)
+        print("🔎 Explanations written to", expl_path)
+
+    reused = int(hit.sum())
+    return {
+        "rows":        total,
+        "rescored":    total - reused,
+        "reused":      reused,
+        "reuse_ratio": reused / total if total else 0.0,
+        "rejected_rows": report.rejected_rows,
+        "errors":      report.to_dict() if report else None,
+    }
@@ -0,0 +1,206 @@
+"""
+Schema and value checks for uploaded claim files.
+
+validate_upload() looks only at the header and the first chunk, so a file
+that is missing columns or is systematically malformed is rejected before
+the rest of it is read. check_rows() runs over the full frame during
+scoring; rows it flags are left out of scoring and summarised in an
+ErrorReport instead of failing the whole job.
+"""
+import lzma
+import zipfile
+
+import pandas as pd
+
+from compression import open_upload
+from explain import split_pipeline
+
+FIRST_CHUNK_ROWS = 500
+# A column whose non-empty values in the first chunk are mostly invalid is
+# treated as a schema problem (wrong format, shifted columns), not bad rows.
+MAX_INVALID_FRACTION = 0.5
+MAX_EXAMPLES = 20
+
+REQUIRED_COLUMNS = [
+    'Policy status',
+    'License',
+    'Driver age',
+    'drunk driving',
+    'FIR filed?',
+    'No. of previous claims',
+    'Time of incident',
+    'Time of claim',
+]
+ALLOWED_VALUES = {
+    'Policy status': {'active', 'inactive'},
+    'License':       {'Yes', 'No'},
+    'FIR filed?':    {'Yes', 'No'},
+    'drunk driving': {'Yes', 'No'},
+}
+# What prepare_features() fills empty categorical cells with
+IMPUTED_VALUES = {
+    'Policy status': 'Unknown',
+    'License':       'Unknown',
+    'drunk driving': 'No',
+    'FIR filed?':    'No',
+}
+CLAIM_STATUS_VALUES = {'Genuine Claim', 'Fraud Claim'}
+NUMERIC_RANGES = {
+    'Driver age':             (0, 120),
+    'No. of previous claims': (0, 100),
+}
+TIMESTAMP_COLUMNS = ['Time of incident', 'Time of claim']
+
+
+class UploadValidationError(ValueError):
+    """The upload cannot be scored; `problems` lists every reason found."""
+
+    def __init__(self, problems):
+        self.problems = list(problems)
+        super().__init__("; ".join(self.problems))
+
+
+def find_claim_status_column(columns):
+    """The ground-truth column, e.g. 'Original Claim status' (None if absent)."""
+    for c in columns:
+        if c.lower().startswith('original') and 'claim' in c.lower():
+            return c
+    return None
+
+
+def encoder_categories(pipeline) -> dict:
+    """Column → categories the pipeline's fitted encoder accepts.
+
+    Encoders that ignore unknown categories are left out, since any value
+    is safe for them.
+    """
+    pre, _ = split_pipeline(pipeline)
+    categories = {}
+    for _, encoder, columns in pre.transformers_:
+        if not hasattr(encoder, 'categories_'):
+            continue
+        if getattr(encoder, 'handle_unknown', 'error') != 'error':
+            continue
+        for column, values in zip(columns, encoder.categories_):
+            categories[column] = set(values)
+    return categories
+
+
+class ErrorReport:
+    """Per-column counts of row-level problems plus a few example rows."""
+
+    def __init__(self):
+        self.counts = {}
+        self.examples = []
+        self.rejected_rows = 0
+
+    def add(self, column, reason, lines, values):
+        if not len(lines):
+            return
+        key = (column, reason)
+        self.counts[key] = self.counts.get(key, 0) + len(lines)
+        room = MAX_EXAMPLES - len(self.examples)
+        for line, value in list(zip(lines, values))[:max(room, 0)]:
+            self.examples.append(
+                {'line': int(line), 'column': column, 'value': str(value), 'reason': reason}
+            )
+
+    def __bool__(self):
+        return bool(self.counts)
+
+    def to_dict(self) -> dict:
+        by_column = {}
+        for (column, reason), n in self.counts.items():
+            by_column.setdefault(column, {})[reason] = n
+        return {
+            'rejected_rows': self.rejected_rows,
+            'by_column':     by_column,
+            'examples':      self.examples,
+        }
+
+
+def check_rows(df: pd.DataFrame, parse_date, report: ErrorReport = None, first_line: int = 2,
+               categories: dict = None):
+    """
+    Validate values column by column, vectorised. Present-but-invalid values
+    mark the row as bad. Empty cells are imputed later, so they are only bad
+    in a categorical column whose imputed value the encoder would reject.
+    `categories` (from encoder_categories) overrides ALLOWED_VALUES.
+
+    Numeric columns are coerced and timestamp columns parsed in place so the
+    scoring step can reuse them. Returns a boolean Series of bad rows.
+    `first_line` is the file line of df's first row (2 = just after the header).
+    """
+    report = report if report is not None else ErrorReport()
+    bad = pd.Series(False, index=df.index)
+    lines = pd.RangeIndex(first_line, first_line + len(df))
+
+    def flag(column, reason, mask, raw):
+        nonlocal bad
+        mask = mask.fillna(False).to_numpy(dtype=bool)
+        report.add(column, reason, lines[mask], raw[mask])
+        bad |= mask
+
+    allowed = {**ALLOWED_VALUES, **(categories or {})}
+    status_col = find_claim_status_column(df.columns)
+    if status_col is not None:
+        allowed[status_col] = CLAIM_STATUS_VALUES
+    for column, values in allowed.items():
+        if column in df.columns:
+            raw = df[column]
+            flag(column, 'unexpected category', raw.notna() & ~raw.isin(values), raw.to_numpy())
+            if column in IMPUTED_VALUES and IMPUTED_VALUES[column] not in values:
+                flag(column, 'missing value', raw.isna(), raw.to_numpy())
+
+    for column, (lo, hi) in NUMERIC_RANGES.items():
+        if column in df.columns:
+            raw = df[column]
+            num = pd.to_numeric(raw, errors='coerce')
+            flag(column, 'not a number', raw.notna() & num.isna(), raw.to_numpy())
+            flag(column, 'out of range', (num < lo) | (num > hi), raw.to_numpy())
+            df[column] = num
+
+    for column in TIMESTAMP_COLUMNS:
+        if column in df.columns:
+            raw = df[column]
+            uniq = raw.dropna().unique()   # claim files repeat timestamps a lot
+            parsed = pd.to_datetime(raw.map(dict(zip(uniq, map(parse_date, uniq)))), errors='coerce')
+            flag(column, 'unparseable timestamp', raw.notna() & parsed.isna(), raw.to_numpy())
+            df[column] = parsed
+
+    return bad
+
+
+def validate_upload(data_path, parse_date, categories: dict = None):
+    """
+    Fast-fail check on the header and first FIRST_CHUNK_ROWS rows.
+
+    Raises UploadValidationError listing missing columns, an unreadable
+    file, or columns whose present values are mostly invalid. Empty cells
+    are left to the per-row check.
+    """
+    try:
+        with open_upload(data_path) as f:
+            head = pd.read_csv(f, nrows=FIRST_CHUNK_ROWS)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError,
+            ValueError, OSError, EOFError, lzma.LZMAError, zipfile.BadZipFile) as e:
+        raise UploadValidationError([f"Could not read the file as CSV: {e}"])
+
+    problems = [f"Missing required column: {c!r}" for c in REQUIRED_COLUMNS if c not in head.columns]
+    if find_claim_status_column(head.columns) is None:
+        problems.append("Missing original-claim column (e.g. 'Original Claim status')")
+    if problems:
+        raise UploadValidationError(problems)
+    if head.empty:
+        raise UploadValidationError(["File has a header but no rows"])
+
+    present = head.notna().sum()
+    report = ErrorReport()
+    check_rows(head, parse_date, report, categories=categories)
+    for (column, reason), n in report.counts.items():
+        if reason != 'missing value' and present[column] and n / present[column] > MAX_INVALID_FRACTION:
+            problems.append(
+                f"{column!r}: {n} of the first {present[column]} values failed ({reason})"
+            )
+    if problems:
+        raise UploadValidationError(problems)
@@ -0,0 +1,138 @@
+"""
+Claim-velocity features for the scoring paths: how many other claims share a
+policy_id / region_code within a trailing 24h or 7d window of each claim.
+
+The feature definitions and the batch sort-and-scan live in
+src/claim_velocity.py, shared with training. This module adds the streaming
+VelocityTracker used by upload scoring. The features are only fed to the
+model when the loaded pipeline was trained on them.
+"""
+import sys
+import threading
+from bisect import bisect_right, insort
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Appended, not prepended: src/ has its own testing.py that must not shadow ours
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+from claim_velocity import (  # noqa: E402
+    VELOCITY_FEATURES, VELOCITY_KEYS, VELOCITY_WINDOWS, add_velocity_features, to_seconds,
+)
+
+CHUNK_ROWS = 2000
+SWEEP_EVERY = 1024
+
+_WINDOW_SECONDS = {name: int(w.total_seconds()) for name, w in VELOCITY_WINDOWS.items()}
+
+
+class VelocityTracker:
+    """
+    Streaming variant of add_velocity_features with bounded state.
+
+    Each key value keeps a sorted list of claim times (epoch seconds). Every
+    update inserts the chunk's claims, then counts each claim's window with
+    two bisects instead of re-sorting the history. Claims that have fallen
+    out of the longest window behind the newest one seen are dropped, and
+    idle keys are swept periodically.
+
+    Counts equal the batch computation when chunks arrive in claim-time order
+    and equal timestamps are not split across chunks.
+    """
+
+    def __init__(self, time_col='Time of claim'):
+        self.time_col = time_col
+        self.retain   = int(max(VELOCITY_WINDOWS.values()).total_seconds())
+        self.events   = {k: {} for k in VELOCITY_KEYS}   # key column → value → sorted times
+        self.latest   = None
+        self.lock     = threading.Lock()
+        self._updates = 0
+
+    def update(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Record `chunk`'s claims and return their velocity features."""
+        n = len(chunk)
+        times = to_seconds(chunk[self.time_col]) if n else np.array([], dtype='int64')
+        valid_t = pd.to_datetime(chunk[self.time_col]).notna().to_numpy()
+        keys = {
+            k: chunk[k].to_numpy(dtype=object) if k in chunk.columns else np.full(n, None)
+            for k in VELOCITY_KEYS
+        }
+        out = np.zeros((n, len(VELOCITY_FEATURES)), dtype='int64')
+
+        with self.lock:
+            # 1) insert the whole chunk first, so ties within it see each other
+            for i in range(n):
+                if not valid_t[i]:
+                    continue
+                t = int(times[i])
+                for k, vals in keys.items():
+                    if not pd.isna(vals[i]):
+                        insort(self.events[k].setdefault(vals[i], []), t)
+
+            # 2) count other claims in (t - w, t] for every key and window
+            for i in range(n):
+                if not valid_t[i]:
+                    continue
+                t = int(times[i])
+                j = 0
+                for k, vals in keys.items():
+                    lst = None if pd.isna(vals[i]) else self.events[k].get(vals[i])
+                    for w in _WINDOW_SECONDS.values():
+                        if lst:
+                            out[i, j] = bisect_right(lst, t) - bisect_right(lst, t - w) - 1
+                        j += 1
+
+            # 3) prune state that can no longer fall inside any window
+            if valid_t.any():
+                newest = int(times[valid_t].max())
+                self.latest = newest if self.latest is None else max(self.latest, newest)
+                cutoff = self.latest - self.retain
+                for k, vals in keys.items():
+                    for v in set(vals[valid_t]):
+                        lst = None if pd.isna(v) else self.events[k].get(v)
+                        if lst:
+                            del lst[:bisect_right(lst, cutoff)]
+                self._updates += 1
+                if self._updates % SWEEP_EVERY == 0:
+                    self._sweep(cutoff)
+
+        return pd.DataFrame(out, columns=VELOCITY_FEATURES, index=chunk.index)
+
+    def _sweep(self, cutoff):
+        """Drop keys whose newest claim is past the retention cutoff."""
+        for per_key in self.events.values():
+            for v in [v for v, lst in per_key.items() if not lst or lst[-1] <= cutoff]:
+                del per_key[v]
+
+    def __len__(self):
+        return sum(len(lst) for per_key in self.events.values() for lst in per_key.values())
+
+
+def stream_velocity_features(df: pd.DataFrame, time_col='Time of claim',
+                             chunk_rows=CHUNK_ROWS) -> pd.DataFrame:
+    """
+    Velocity features for an upload, fed through a fresh VelocityTracker in
+    claim-time order and in chunks of about `chunk_rows`. Chunk boundaries
+    never split equal timestamps, so the result matches
+    add_velocity_features exactly while the tracker only holds claims inside
+    the retention window.
+    """
+    n = len(df)
+    if n == 0:
+        return pd.DataFrame(columns=VELOCITY_FEATURES, index=df.index, dtype='int64')
+    st = pd.to_datetime(df[time_col]).to_numpy()
+    order = np.argsort(st, kind='stable')     # NaT sorts last
+    st = st[order]
+
+    starts = np.zeros(n, dtype=bool)
+    starts[::chunk_rows] = True
+    starts[1:] &= ~(st[1:] == st[:-1])
+    bounds = list(np.flatnonzero(starts)) + [n]
+
+    tracker = VelocityTracker(time_col)
+    parts = [
+        tracker.update(df.iloc[order[a:b]])
+        for a, b in zip(bounds[:-1], bounds[1:])
+    ]
+    return pd.concat(parts).reindex(df.index)
@@ -0,0 +1,61 @@
+"""
+Claim-velocity features: how many *other* claims share a policy_id /
+region_code within a trailing 24h or 7d window of each claim.
+
+Shared by src/preprocessing.py (training) and backend/velocity.py (scoring);
+keep this module free of import-time side effects.
+"""
+import numpy as np
+import pandas as pd
+
+VELOCITY_KEYS    = ['policy_id', 'region_code']
+VELOCITY_WINDOWS = {'24h': pd.Timedelta(hours=24), '7d': pd.Timedelta(days=7)}
+VELOCITY_FEATURES = [f'claims_{k}_{w}' for k in VELOCITY_KEYS for w in VELOCITY_WINDOWS]
+
+
+def to_seconds(times) -> np.ndarray:
+    """Timestamps as int64 epoch seconds (the resolution the counts use)."""
+    return pd.to_datetime(pd.Series(times)).to_numpy().astype('datetime64[s]').astype('int64')
+
+
+def rolling_counts(keys, times, window):
+    """
+    For each row, count the *other* rows with the same key whose time falls
+    in (t - window, t]. Rows with a missing key or time get 0.
+
+    Sort-and-scan: every key is shifted onto its own stretch of one integer
+    time axis, so a single sort plus two searchsorted calls answer all rows.
+    """
+    keys  = pd.Series(keys).reset_index(drop=True)
+    times = pd.to_datetime(pd.Series(times)).reset_index(drop=True)
+    out   = np.zeros(len(keys), dtype='int64')
+    valid = (keys.notna() & times.notna()).to_numpy()
+    if not valid.any():
+        return out
+
+    codes = pd.factorize(keys[valid])[0].astype('int64')
+    t = times[valid].to_numpy().astype('datetime64[s]').astype('int64')
+    t = t - t.min()
+    w = int(window.total_seconds())
+    span = int(t.max()) + w + 1
+    pos = codes * span + t
+
+    sorted_pos = np.sort(pos)
+    out[valid] = (
+        np.searchsorted(sorted_pos, pos, side='right')
+        - np.searchsorted(sorted_pos, pos - w, side='right')
+        - 1
+    )
+    return out
+
+
+def add_velocity_features(df, time_col):
+    """Add a claims_<key>_<window> column for every key present in df."""
+    for key in VELOCITY_KEYS:
+        for name, window in VELOCITY_WINDOWS.items():
+            col = f'claims_{key}_{name}'
+            if key in df.columns:
+                df[col] = rolling_counts(df[key], df[time_col], window)
+            else:
+                df[col] = 0
+    return df
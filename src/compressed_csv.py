@@ -0,0 +1,77 @@
+"""
+Reading compressed claim CSVs and naming result files.
+
+Shared by src/testing.py and the backend (re-exported by
+backend/compression.py); keep this module free of import-time side effects.
+"""
+import bz2
+import gzip
+import lzma
+import zipfile
+from pathlib import Path
+from typing import Optional
+
+# Leading bytes of each supported container, checked in order.
+MAGIC_BYTES = [
+    (b"\x1f\x8b",           "gzip"),
+    (b"BZh",                "bz2"),
+    (b"\xfd7zXZ\x00",       "xz"),
+    (b"PK\x03\x04",         "zip"),
+]
+
+# pandas `compression=` name → file suffix for compressed results
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "bz2": ".bz2", "xz": ".xz", "zip": ".zip"}
+
+_STRIP_SUFFIXES = {".gz", ".gzip", ".bz2", ".xz", ".zip", ".csv", ".csc"}
+
+
+def sniff_compression(path) -> Optional[str]:
+    """Return 'gzip', 'bz2', 'xz' or 'zip' from the file header, or None for plain files."""
+    with open(path, "rb") as f:
+        head = f.read(8)
+    for magic, name in MAGIC_BYTES:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def open_upload(path):
+    """Open an upload for reading, decompressing on the fly if needed.
+
+    Returns a binary file object that pandas can read directly; nothing is
+    decompressed to disk. Zip archives must contain exactly one CSV member.
+    """
+    kind = sniff_compression(path)
+    if kind == "gzip":
+        return gzip.open(path, "rb")
+    if kind == "bz2":
+        return bz2.open(path, "rb")
+    if kind == "xz":
+        return lzma.open(path, "rb")
+    if kind == "zip":
+        with zipfile.ZipFile(path) as zf:
+            members = [m for m in zf.namelist() if not m.endswith("/")]
+            csvs = [m for m in members if m.lower().endswith(".csv")] or members
+            if len(csvs) != 1:
+                raise ValueError(f"Zip upload must contain exactly one CSV, found {csvs}")
+            # The member handle keeps the archive open after the with-block.
+            return zf.open(csvs[0])
+    return open(path, "rb")
+
+
+def dataset_stem(path) -> str:
+    """'claims.csv.gz' → 'claims': strip compression and CSV suffixes."""
+    p = Path(path)
+    name = p.name
+    while Path(name).suffix.lower() in _STRIP_SUFFIXES:
+        name = name[: -len(Path(name).suffix)]
+    return name
+
+
+def results_path(directory, stem: str, kind: str, compression: Optional[str] = None) -> Path:
+    """Path for a '<stem>_<kind>.csv' results file, with a suffix if compressed."""
+    if compression is not None and compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unsupported compression {compression!r}; "
+                         f"use one of {sorted(COMPRESSION_SUFFIXES)}")
+    suffix = COMPRESSION_SUFFIXES.get(compression, "")
+    return Path(directory) / f"{stem}_{kind}.csv{suffix}"
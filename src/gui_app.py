@@ -6,6 +6,8 @@ from datetime import datetime
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from claim_velocity import VELOCITY_FEATURES, add_velocity_features
+
 # ----- Load Model & Data -----
 PIPELINE_PATH = 'fraud_detection_pipeline.joblib'
 DATA_PATH     = '../data/final_dataset.csv'
@@ -13,6 +15,21 @@ DATA_PATH     = '../data/final_dataset.csv'
 pipeline = joblib.load(PIPELINE_PATH)
 df_all   = pd.read_csv(DATA_PATH)
 
+# Input columns the pipeline was fitted on; claim-velocity counts are taken
+# from the reference data as in training (medians for claims not in it)
+FEATURES = list(getattr(pipeline, 'feature_names_in_', [
+    'Policy status', 'License', 'Driver age', 'drunk driving',
+    'FIR filed?', 'No. of previous claims', 'time_diff_hrs',
+]))
+VELOCITY_COLS = [c for c in FEATURES if c in VELOCITY_FEATURES]
+if VELOCITY_COLS:
+    claim_dt = pd.to_datetime(
+        df_all['Time of claim'].str.replace(' IST', '', regex=False),
+        format='%Y-%m-%d %I:%M %p',
+        errors='coerce'
+    )
+    velocity_by_row = add_velocity_features(df_all.assign(claim_dt=claim_dt), 'claim_dt')[VELOCITY_COLS]
+
 # ----- Helper to compute time difference in hours -----
 def compute_time_diff(inc_str, claim_str):
     # Remove trailing " IST"
@@ -81,7 +98,12 @@ def predict_claim():
             'time_diff_hrs': [compute_time_diff(fields['Time of incident'].get(),
                                                 fields['Time of claim'].get())]
         }
-        X_new = pd.DataFrame(data)
+        if VELOCITY_COLS:
+            match = df_all.index[df_all['policy_id'] == fields['Policy ID'].get().strip()]
+            counts = velocity_by_row.loc[match[0]] if len(match) else velocity_by_row.median()
+            for c in VELOCITY_COLS:
+                data[c] = [counts[c]]
+        X_new = pd.DataFrame(data)[FEATURES]
         proba = pipeline.predict_proba(X_new)[0]
         if proba[1] >= 0.90:
             pred_label = 'Genuine Claim'
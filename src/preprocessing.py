@@ -3,6 +3,9 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.compose import ColumnTransformer
 
+# Shared with the backend scoring path so training and serving agree
+from claim_velocity import VELOCITY_FEATURES, add_velocity_features
+
 # 1. Load data
 df = pd.read_csv('../data/final_dataset.csv')
 
@@ -18,15 +21,16 @@ df['claim_dt'] = pd.to_datetime(
     errors='coerce'
 )
 df['time_diff_hrs'] = (df['claim_dt'] - df['incident_dt']).dt.total_seconds()/3600
+df = add_velocity_features(df, 'claim_dt')
 
 # 3. Features & target
 X = df[['Policy status','License','Driver age','drunk driving',
-        'FIR filed?','No. of previous claims','time_diff_hrs']]
+        'FIR filed?','No. of previous claims','time_diff_hrs'] + VELOCITY_FEATURES]
 y = df['Claim status'].map({'Fraud Claim':0,'Genuine Claim':1})
 
 # 4. Preprocessor
 cat = ['Policy status','License','drunk driving','FIR filed?']
-num = ['Driver age','No. of previous claims','time_diff_hrs']
+num = ['Driver age','No. of previous claims','time_diff_hrs'] + VELOCITY_FEATURES
 preprocessor = ColumnTransformer([
     ('cat', OneHotEncoder(drop='first'), cat),
     ('num', StandardScaler(), num)
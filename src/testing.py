@@ -4,6 +4,10 @@ import joblib
 from datetime import datetime
 import time
 import os
+import argparse
+
+from claim_velocity import VELOCITY_FEATURES, add_velocity_features
+from compressed_csv import COMPRESSION_SUFFIXES, dataset_stem, open_upload, results_path
 
 # Paths
 PIPELINE_PATH    = 'fraud_detection_pipeline.joblib'
@@ -25,13 +29,21 @@ def parse_date(dt_str):
     # fallback without deprecated infer_datetime_format
     return pd.to_datetime(s, dayfirst=True).to_pydatetime()
 
-def test(data_path):
+def test(data_path, compression=None):
+    """
+    Score a (possibly compressed) CSV. Pass compression='gzip' / 'bz2' /
+    'xz' / 'zip' to write the results CSV compressed; any other value
+    raises ValueError.
+    """
+    data_dir = pathlib.Path(data_path).parent
+    stem = dataset_stem(data_path)
+    summary_txt_path = data_dir / f'{stem}_Prediction_summary.txt'
+    out_csv_path = results_path(data_dir, stem, 'Results', compression)
 
     # Load model and data
     pipeline = joblib.load(PIPELINE_PATH)
-    df = pd.read_csv(data_path)
-    summary_txt_path = data_path[:-4] + '_Prediction_summary.txt'
-    out_csv_path = data_path[:-4] + '_Results.csv'
+    with open_upload(data_path) as f:
+        df = pd.read_csv(f)
 
     # 1) Parse datetimes
     df['Time of incident'] = df['Time of incident'].map(parse_date)
@@ -42,8 +54,9 @@ def test(data_path):
         df['Time of claim'] - df['Time of incident']
     ).dt.total_seconds() / 3600
 
-    # 3) Select features and copy
-    feats = [
+    # 3) Select the features the pipeline was fitted on (artifacts trained
+    # before the claim-velocity columns have only the first seven)
+    feats = list(getattr(pipeline, 'feature_names_in_', [
         'Policy status',
         'License',
         'Driver age',
@@ -51,7 +64,9 @@ def test(data_path):
         'FIR filed?',
         'No. of previous claims',
         'time_diff_hrs'
-    ]
+    ]))
+    if any(c in VELOCITY_FEATURES for c in feats):
+        add_velocity_features(df, 'Time of claim')
     X_new = df[feats].copy()
 
     # 4) Impute missing values (no chained assignment)
@@ -82,7 +97,7 @@ def test(data_path):
         'Original Claim status',
         'Model Predicted Output'
     ]]
-    out.to_csv(out_csv_path, index=False)
+    out.to_csv(out_csv_path, index=False, compression=compression)
 
     # 8) Build summary stats
     total     = len(out)
@@ -111,10 +126,15 @@ def test(data_path):
 
     # 10) Print out file URIs
     print("✅ Done!")
-    print("📄 Results:", pathlib.Path(out_csv_path).absolute().as_uri())
-    print("📝 Summary:", pathlib.Path(summary_txt_path).absolute().as_uri())
+    print("📄 Results:", out_csv_path.absolute().as_uri())
+    print("📝 Summary:", summary_txt_path.absolute().as_uri())
 
 if __name__ == "__main__":
-    # Run on whichever dataset you need:
-    test(DATA_PATH_2)
-    test(DATA_PATH_1)
+    parser = argparse.ArgumentParser(description="Score CSVs and write results and summaries.")
+    parser.add_argument("data_paths", nargs="*", default=[DATA_PATH_2, DATA_PATH_1],
+                        help="plain or gzip/bz2/xz/zip CSVs (default: the two test datasets)")
+    parser.add_argument("--compression", choices=sorted(COMPRESSION_SUFFIXES),
+                        help="write the results CSV compressed")
+    args = parser.parse_args()
+    for path in args.data_paths:
+        test(path, args.compression)
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
-import { fetchUploadedSummary } from './api';
+import { fetchUploadedSummaryJson } from './api';
 import {
   BarChart, Bar, XAxis,
   PieChart, Pie, Cell, Legend,
@@ -14,31 +14,23 @@ export default function DetailedSummaryPage() {
   const { datasetName } = useParams();
   const [metrics, setMetrics] = useState(null);
 
-  const parseSummary = txt => {
-    const lines = txt.split('\n').map(l => l.trim());
-    const find = label => {
-      const row = lines.find(r => r.startsWith(label));
-      if (!row) return 0;
-      const raw = row.split(':')[1].trim();
-      return label.includes('Accuracy')
-        ? parseFloat(raw.replace('%',''))
-        : parseInt(raw.replace(/,/g,''),10);
-    };
+  const toMetrics = json => {
+    const num = key => (typeof json[key] === 'number' ? json[key] : 0);
     return {
-      total:            find('Total Records'),
-      actualGenuine:    find('Actual Genuine Claims'),
-      predictedGenuine: find('Predicted Genuine Claims'),
-      actualFraud:      find('Actual Fraud Claims'),
-      predictedFraud:   find('Predicted Fraud Claims'),
-      correct:          find('Correctly Predicted'),
-      incorrect:        find('Incorrectly Predicted'),
-      accuracy:         find('Accuracy of the Model is'),
+      total:            num('total_records'),
+      actualGenuine:    num('actual_genuine'),
+      predictedGenuine: num('predicted_genuine'),
+      actualFraud:      num('actual_fraud'),
+      predictedFraud:   num('predicted_fraud'),
+      correct:          num('correct'),
+      incorrect:        num('incorrect'),
+      accuracy:         num('accuracy_pct'),
     };
   };
 
   useEffect(() => {
-    fetchUploadedSummary(datasetName)
-      .then(txt => setMetrics(parseSummary(txt)))
+    fetchUploadedSummaryJson(datasetName)
+      .then(json => setMetrics(toMetrics(json)))
       .catch(console.error);
   }, [datasetName]);
 
@@ -13,12 +13,12 @@ export default function SummaryPage() {
   const handleUpload = async () => {
     if (!file) return;
     setUploading(true);
-    const datasetName = file.name.replace(/\.csv$/i, '');
     const form = new FormData();
     form.append('file', file);
 
     try {
-      const res = await fetch('http://localhost:8000/summary/upload', {
+      // JSON reply carries the dataset name the server filed the summary under
+      const res = await fetch('http://localhost:8000/summary/upload?format=json', {
         method: 'POST',
         body: form
       });
@@ -26,7 +26,8 @@ export default function SummaryPage() {
         const errText = await res.text();
         throw new Error(errText);
       }
-      navigate(`/summary/${encodeURIComponent(datasetName)}`);
+      const summary = await res.json();
+      navigate(`/summary/${encodeURIComponent(summary.dataset)}`);
     } catch (err) {
       console.error(err);
       alert('Upload failed:\n' + err.message);
@@ -69,7 +70,7 @@ export default function SummaryPage() {
         <div className="upload-card glass-card">
           <input
             type="file"
-            accept=".csv"
+            accept=".csv,.gz,.bz2,.xz,.zip"
             onChange={handleFileChange}
             ref={fileInputRef}
             className="file-input"
@@ -9,9 +9,9 @@ export function fetchSummary() {
                .then(r => r.data);
 }
 
-// specific uploaded summary
-export function fetchUploadedSummary(datasetName) {
-  return client.get(`/summary/${datasetName}`, { responseType: 'text' })
+// structured summaries (same metrics as JSON; server answers 304 when unchanged)
+export function fetchUploadedSummaryJson(datasetName) {
+  return client.get(`/summary/${datasetName}`, { params: { format: 'json' } })
                .then(r => r.data);
 }
 